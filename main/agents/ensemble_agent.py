@@ -1,3 +1,4 @@
+import asyncio
 from agents.agent import Agent
 from agents.specialist_agent import SpecialistAgent
 from agents.neural_network_agent import NeuralNetworkAgent
@@ -31,6 +32,21 @@ class EnsembleAgent(Agent):
         self.log("Running Ensemble Agent - preprocessing text")
         rewrite = self.preprocessor.preprocess(description)
         self.log(f"Pre-processed text using {self.preprocessor.model_name}")
+        return self._combine(rewrite)
+
+    async def aprice(self, description: str) -> float:
+        """
+        Async variant of price, so several products can be priced concurrently
+        The preprocessing LLM call is awaited; the model calls run in a worker thread
+        :param description: the description of a product
+        :return: an estimate of its price
+        """
+        self.log("Running Ensemble Agent - preprocessing text")
+        rewrite = await self.preprocessor.apreprocess(description)
+        self.log(f"Pre-processed text using {self.preprocessor.model_name}")
+        return await asyncio.to_thread(self._combine, rewrite)
+
+    def _combine(self, rewrite: str) -> float:
         specialist = self.specialist.price(rewrite)
         neural_network = self.neural_network.price(rewrite)
         combined = neural_network * 0.9 + specialist * 0.1
@@ -1,14 +1,76 @@
+import asyncio
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+import litellm
+import requests
+from requests.adapters import HTTPAdapter
 from agents.deals import Opportunity
 from agents.agent import Agent
-from litellm import completion
-from mailjet_rest import Client
+
+MAILJET_SEND_URL = "https://api.mailjet.com/v3.1/send"
+
+# Kept byte-identical across calls so providers can serve it from their prompt cache
+CRAFT_MESSAGE_INSTRUCTIONS = (
+    "Please summarize this great deal in 2-3 sentences to be sent as an exciting push notification alerting the user about this deal.\n"
+    "Respond only with the 2-3 sentence message which will be used to alert & excite the user about this deal"
+)
+
+
+class SendRateLimiter:
+    """
+    In-process token bucket that caps how fast emails are sent.
+    Tokens refill continuously; acquiring blocks until one is available.
+    Thread-safe, since sends run on worker threads.
+    """
+    
+    # Configuration from environment
+    SENDS_PER_MINUTE = int(os.getenv("MAILJET_SENDS_PER_MINUTE", "20"))
+    
+    def __init__(self, rate: int = None, per: float = 60.0):
+        """Initialize a full bucket holding `rate` tokens refilled every `per` seconds."""
+        self.capacity = rate or self.SENDS_PER_MINUTE
+        self.refill_rate = self.capacity / per
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        """Adds the tokens accrued since the last refill, up to capacity."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+    
+    def acquire(self) -> None:
+        """Takes one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.refill_rate
+            time.sleep(wait)
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
 
 
 class MessagingAgent(Agent):
     name = "Messaging Agent"
     color = Agent.WHITE
     MODEL = "openrouter/xiaomi/mimo-v2-flash"
+    MAX_SEND_RETRIES = 3
+    # Matches the timeout the mailjet_rest client used, so a stalled connection can't hold an alert worker forever
+    SEND_TIMEOUT_SECONDS = 60
+    MESSAGE_CACHE_SIZE = 512
 
     def __init__(self):
         """
@@ -19,7 +81,13 @@ class MessagingAgent(Agent):
         self.api_secret = os.getenv("MAILJET_API_SECRET")
         self.from_email = os.getenv("MAILJET_FROM_EMAIL")
         self.to_email = os.getenv("MAILJET_TO_EMAIL")
-        self.mailjet = Client(auth=(self.api_key, self.api_secret), version='v3.1')
+        # Reuse one keep-alive connection pool so each alert skips the TLS handshake
+        self._session = requests.Session()
+        self._session.auth = (self.api_key, self.api_secret)
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self._bucket = SendRateLimiter()
+        # Crafted messages keyed on the normalized deal, so reposted deals skip the LLM call
+        self._message_cache = OrderedDict()
         self.log("Messaging Agent has initialized Mailjet and LLM")
 
     def send_email(self, text: str, subject: str = "Deal Alert!", to_email: str = None):
@@ -51,10 +119,18 @@ class MessagingAgent(Agent):
                 }
             ]
         }
-        result = self.mailjet.send.create(data=data)
+        for attempt in range(self.MAX_SEND_RETRIES + 1):
+            with self._bucket:
+                result = self._session.post(MAILJET_SEND_URL, json=data, timeout=self.SEND_TIMEOUT_SECONDS)
+            if result.status_code != 429 or attempt == self.MAX_SEND_RETRIES:
+                break
+            # Throttled by Mailjet - back off exponentially before retrying
+            delay = 2 ** attempt
+            self.log(f"Messaging Agent was rate limited by Mailjet, retrying in {delay}s")
+            time.sleep(delay)
         return result.json()
 
-    def alert(self, opportunity: Opportunity, to_email: str = None):
+    async def alert(self, opportunity: Opportunity, to_email: str = None):
         """
         Make an alert about the specified Opportunity
         
@@ -68,24 +144,56 @@ class MessagingAgent(Agent):
         text += f"🏷️ Discount: ${opportunity.discount:.2f}\n\n"
         text += f"📦 Product: {opportunity.deal.product_description}\n\n"
         text += f"🔗 Link: {opportunity.deal.url}\n"
-        self.send_email(text, to_email=to_email)
+        await asyncio.to_thread(self.send_email, text, to_email=to_email)
         self.log("Messaging Agent has completed")
 
-    def craft_message(
+    async def alert_all(self, opportunities: List[Opportunity], to_email: str = None):
+        """
+        Send alerts for several Opportunities concurrently
+        
+        Args:
+            opportunities: The deal opportunities to alert about
+            to_email: Optional recipient email. Uses environment variable if not provided.
+        """
+        await asyncio.gather(*[self.alert(opportunity, to_email=to_email) for opportunity in opportunities])
+
+    async def craft_message(
         self, description: str, deal_price: float, estimated_true_value: float
     ) -> str:
-        user_prompt = "Please summarize this great deal in 2-3 sentences to be sent as an exciting push notification alerting the user about this deal.\n"
-        user_prompt += f"Item Description: {description}\nOffered Price: {deal_price}\nEstimated true value: {estimated_true_value}"
-        user_prompt += "\n\nRespond only with the 2-3 sentence message which will be used to alert & excite the user about this deal"
-        response = completion(
+        normalized = " ".join(description.lower().split())
+        key = (
+            hashlib.sha1(normalized.encode("utf-8")).hexdigest(),
+            round(deal_price, 2),
+            round(estimated_true_value, 2),
+        )
+        if key in self._message_cache:
+            self._message_cache.move_to_end(key)
+            return self._message_cache[key]
+
+        user_prompt = f"Item Description: {description}\nOffered Price: {deal_price}\nEstimated true value: {estimated_true_value}"
+        response = await litellm.acompletion(
             model=self.MODEL,
             messages=[
+                {
+                    "role": "system",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": CRAFT_MESSAGE_INSTRUCTIONS,
+                            "cache_control": {"type": "ephemeral"},
+                        }
+                    ],
+                },
                 {"role": "user", "content": user_prompt},
             ],
         )
-        return response.choices[0].message.content
+        message = response.choices[0].message.content
+        self._message_cache[key] = message
+        if len(self._message_cache) > self.MESSAGE_CACHE_SIZE:
+            self._message_cache.popitem(last=False)
+        return message
 
-    def notify(self, description: str, deal_price: float, estimated_true_value: float, url: str, to_email: str = None):
+    async def notify(self, description: str, deal_price: float, estimated_true_value: float, url: str, to_email: str = None):
         """
         Make an alert about the specified details
         
@@ -107,5 +215,5 @@ class MessagingAgent(Agent):
         text += f"📦 Product: {description}\n\n"
         text += f"🔗 Link: {url}\n"
         
-        self.send_email(text, to_email=to_email)
+        await asyncio.to_thread(self.send_email, text, to_email=to_email)
         self.log("Messaging Agent has completed")
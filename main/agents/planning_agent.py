@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, Future
 from typing import Optional, List
 from agents.agent import Agent
 from agents.deals import ScrapedDeal, DealSelection, Deal, Opportunity
@@ -11,17 +15,39 @@ class PlanningAgent(Agent):
     name = "Planning Agent"
     color = Agent.GREEN
     DEAL_THRESHOLD = 50
+    # Upper bound on concurrent pricing calls, to stay under LLM provider rate limits
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
 
-    def __init__(self, collection):
+    def __init__(self, collection, alert_executor: Optional[Executor] = None):
         """
         Create instances of the 3 Agents that this planner coordinates across
+        :param alert_executor: optional executor to send alerts in the background
         """
         self.log("Planning Agent is initializing")
         self.scanner = ScannerAgent()
         self.ensemble = EnsembleAgent(collection)
         self.messenger = MessagingAgent()
+        self.alert_executor = alert_executor
         self.log("Planning Agent is ready")
 
+    def send_alerts(self, opportunities: List[Opportunity], user_email: str = None) -> None:
+        """
+        Send alerts for the given opportunities
+        When an alert executor is configured, the alerts are queued and this returns immediately
+        """
+        if self.alert_executor is None:
+            asyncio.run(self.messenger.alert_all(opportunities, to_email=user_email))
+            return
+        future = self.alert_executor.submit(
+            asyncio.run, self.messenger.alert_all(opportunities, to_email=user_email)
+        )
+        future.add_done_callback(self._log_alert_failure)
+
+    @staticmethod
+    def _log_alert_failure(future: Future) -> None:
+        if future.exception() is not None:
+            logging.error(f"Failed to send deal alert: {future.exception()}")
+
     def run(self, deal: Deal) -> Opportunity:
         """
         Run the workflow for a particular deal
@@ -34,6 +60,29 @@ class PlanningAgent(Agent):
         self.log(f"Planning Agent has processed a deal with discount ${discount:.2f}")
         return Opportunity(deal=deal, estimate=estimate, discount=discount)
 
+    async def run_batch(self, deals: List[Deal]) -> List[Opportunity]:
+        """
+        Run the workflow for several deals concurrently
+        All pricing calls are issued up front, then collected together
+        :param deals: the deals, summarized from an RSS scrape
+        :returns: an opportunity for each deal, in the same order
+        """
+        self.log(f"Planning Agent is pricing up {len(deals)} potential deals concurrently")
+        # Created per batch, since asyncio primitives belong to the event loop running them
+        semaphore = asyncio.Semaphore(self.LLM_MAX_CONCURRENCY)
+
+        async def price(deal: Deal) -> float:
+            async with semaphore:
+                return await self.ensemble.aprice(deal.product_description)
+
+        estimates = await asyncio.gather(*[price(deal) for deal in deals])
+        opportunities = []
+        for deal, estimate in zip(deals, estimates):
+            discount = estimate - deal.price
+            self.log(f"Planning Agent has processed a deal with discount ${discount:.2f}")
+            opportunities.append(Opportunity(deal=deal, estimate=estimate, discount=discount))
+        return opportunities
+
     def plan(self, memory: List[str] = [], user_email: str = None) -> Optional[Opportunity]:
         """
         Run the full workflow:
@@ -47,12 +96,13 @@ class PlanningAgent(Agent):
         self.log("Planning Agent is kicking off a run")
         selection = self.scanner.scan(memory=memory)
         if selection:
-            opportunities = [self.run(deal) for deal in selection.deals[:5]]
+            opportunities = asyncio.run(self.run_batch(selection.deals[:5]))
             opportunities.sort(key=lambda opp: opp.discount, reverse=True)
             best = opportunities[0]
             self.log(f"Planning Agent has identified the best deal has discount ${best.discount:.2f}")
-            if best.discount > self.DEAL_THRESHOLD:
-                self.messenger.alert(best, to_email=user_email)
+            pending = [best] if best.discount > self.DEAL_THRESHOLD else []
+            if pending:
+                self.send_alerts(pending, user_email=user_email)
             self.log("Planning Agent has completed a run")
-            return best if best.discount > self.DEAL_THRESHOLD else None
+            return best if pending else None
         return None
\ No newline at end of file
@@ -1,4 +1,4 @@
-from litellm import completion
+from litellm import completion, acompletion
 from dotenv import load_dotenv
 import os
 
@@ -34,6 +34,12 @@ class Preprocessor:
     def messages_for(self, text: str) -> list[dict]:
         return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": text}]
 
+    def _record_usage(self, response) -> str:
+        self.total_input_tokens += response.usage.prompt_tokens
+        self.total_output_tokens += response.usage.completion_tokens
+        self.total_cost += response._hidden_params["response_cost"]
+        return response.choices[0].message.content
+
     def preprocess(self, text: str) -> str:
         messages = self.messages_for(text)
         response = completion(
@@ -41,7 +47,13 @@ class Preprocessor:
             model=self.model_name,
             api_base=self.base_url,
         )
-        self.total_input_tokens += response.usage.prompt_tokens
-        self.total_output_tokens += response.usage.completion_tokens
-        self.total_cost += response._hidden_params["response_cost"]
-        return response.choices[0].message.content
+        return self._record_usage(response)
+
+    async def apreprocess(self, text: str) -> str:
+        messages = self.messages_for(text)
+        response = await acompletion(
+            messages=messages,
+            model=self.model_name,
+            api_base=self.base_url,
+        )
+        return self._record_usage(response)
@@ -1,5 +1,6 @@
 import os
 import chromadb
+from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
 from datasets import load_dataset
 from tqdm import tqdm
 
@@ -8,10 +9,10 @@ DATASET_ID = "kaushikpaul/items_prompts_lite"
 DB_PATH = os.path.join(os.path.dirname(__file__), "products_vectorstore")
 COLLECTION_NAME = "products"
 
-def build():
-    print(f"🚀 Loading dataset: {DATASET_ID}...")
-    # Load from Hugging Face
-    dataset = load_dataset(DATASET_ID, split="train")
+def build(batch_size: int = 512):
+    print(f"🚀 Streaming dataset: {DATASET_ID}...")
+    # Stream from Hugging Face so only one batch is held in memory at a time
+    dataset = load_dataset(DATASET_ID, split="train", streaming=True)
     
     # Initialize ChromaDB
     print(f"📦 Initializing ChromaDB at {DB_PATH}...")
@@ -24,14 +25,24 @@ def build():
     except:
         pass
         
-    collection = client.create_collection(name=COLLECTION_NAME)
+    # Pin the embedding function to Chroma's existing default (ONNX all-MiniLM-L6-v2) so it is explicit
+    collection = client.create_collection(name=COLLECTION_NAME, embedding_function=ONNXMiniLM_L6_V2())
     
-    print(f"✨ Processing {len(dataset)} items...")
+    print(f"✨ Processing items in batches of {batch_size}...")
     
-    # Prepare data for upload
+    # Fixed-size buffers, flushed to Chroma whenever they fill up
     documents = []
     metadatas = []
     ids = []
+    total = 0
+    
+    def flush():
+        # Chroma embeds each batch with the collection's embedding function
+        # all-MiniLM-L6-v2 is great for product matching
+        collection.add(documents=documents, metadatas=metadatas, ids=ids)
+        documents.clear()
+        metadatas.clear()
+        ids.clear()
     
     for i, item in enumerate(tqdm(dataset)):
         # Extract fields
@@ -45,19 +56,15 @@ def build():
         documents.append(desc)
         metadatas.append({"category": cat})
         ids.append(f"prod_{i}")
+        total += 1
         
-    # Batch add to Chroma (Chroma handles embeddings automatically via DefaultEmbeddingFunction)
-    # Default is sentence-transformers/all-MiniLM-L6-v2 which is great for product matching
-    batch_size = 100
-    for i in range(0, len(documents), batch_size):
-        end = min(i + batch_size, len(documents))
-        collection.add(
-            documents=documents[i:end],
-            metadatas=metadatas[i:end],
-            ids=ids[i:end]
-        )
+        if len(documents) >= batch_size:
+            flush()
+    
+    if documents:
+        flush()
         
-    print(f"✅ Successfully populated vector store with {len(documents)} items!")
+    print(f"✅ Successfully populated vector store with {total} items!")
     print(f"📁 Location: {DB_PATH}")
 
 if __name__ == "__main__":
@@ -1,16 +1,17 @@
+import atexit
 import base64
+import functools
+import hashlib
 import os
 import sys
 import logging
+import uuid
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
+import orjson
 from dotenv import load_dotenv
-import chromadb
-from google.cloud import storage
-from agents.planning_agent import PlanningAgent
 from agents.deals import Opportunity
-from sklearn.manifold import TSNE
-import numpy as np
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
@@ -33,6 +34,7 @@ CATEGORIES = [
     "Toys_and_Games",
 ]
 COLORS = ["red", "blue", "brown", "orange", "yellow", "green", "purple", "cyan"]
+CATEGORY_COLOR = dict(zip(CATEGORIES, COLORS))
 
 
 def init_logging():
@@ -52,16 +54,18 @@ def init_logging():
 class DealAgentFramework:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DB = os.path.join(BASE_DIR, "products_vectorstore")
-    MEMORY_FILENAME = os.path.join(BASE_DIR, "database", "memory.json")
+    MEMORY_FILENAME = os.path.join(BASE_DIR, "database", "memory.jsonl")
+    LEGACY_MEMORY_FILENAME = os.path.join(BASE_DIR, "database", "memory.json")
+    TSNE_CACHE_FILENAME = os.path.join(BASE_DIR, "database", "tsne_cache.npz")
     
     # GCP Configuration
     USE_GCP = os.getenv("USE_GCP", "False").lower() == "true"
     GCP_BUCKET_NAME = os.getenv("GCP_BUCKET_NAME", "price-is-right-memory")
-    GCP_BLOB_NAME = "memory.json"
+    GCP_BLOB_NAME = "memory.jsonl"
+    GCP_LEGACY_BLOB_NAME = "memory.json"
 
     def __init__(self):
         init_logging()
-        client = chromadb.PersistentClient(path=self.DB)
         
         # Initialize storage client if using GCP
         self.storage_client = None
@@ -70,13 +74,32 @@ class DealAgentFramework:
         
         # Track whether memory was successfully loaded to prevent accidental overwrite
         self._memory_loaded_successfully = False
+        # Set when memory came from the legacy JSON array, so the next write migrates it to JSONL
+        self._memory_needs_rewrite = False
         self.memory = self.read_memory()
-        self.collection = client.get_or_create_collection("products")
+        self.collection = self._collection()
         self.planner = None
         self.user_email = None  # Email for sending deal alerts
+        # Alerts are sent in the background so a slow email send never delays saving memory
+        self._alert_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="deal-alert")
+        atexit.register(self._alert_executor.shutdown, wait=True)
+
+    @classmethod
+    @functools.lru_cache(maxsize=1)
+    def _client(cls):
+        """Returns the shared ChromaDB client, opened once per process."""
+        import chromadb
+        return chromadb.PersistentClient(path=cls.DB)
+
+    @classmethod
+    @functools.lru_cache(maxsize=1)
+    def _collection(cls):
+        """Returns the shared products collection."""
+        return cls._client().get_or_create_collection("products")
 
     def _init_gcp_client(self):
         """Initializes GCP storage client from base64 secret."""
+        from google.cloud import storage
         try:
             base64_secret = os.getenv("GCP_SERVICE_ACCOUNT_BASE64")
             if not base64_secret:
@@ -89,83 +112,131 @@ class DealAgentFramework:
             logging.error(f"Failed to initialize GCP client: {e}")
             return None
 
-    def _get_gcs_blob(self):
-        """Returns the GCS blob for the memory file."""
+    def _get_gcs_blob(self, blob_name: str = None):
+        """Returns the GCS blob for the memory file, or for the given blob name."""
         if not self.storage_client:
             return None
         bucket = self.storage_client.bucket(self.GCP_BUCKET_NAME)
-        return bucket.blob(self.GCP_BLOB_NAME)
+        return bucket.blob(blob_name or self.GCP_BLOB_NAME)
+
+    @staticmethod
+    def _parse_memory(content: bytes) -> list:
+        """Parses stored memory, either JSON Lines or the legacy JSON array."""
+        if content.lstrip().startswith(b"["):
+            return orjson.loads(content)
+        return [orjson.loads(line) for line in content.splitlines() if line.strip()]
 
     def init_agents_as_needed(self):
         if not self.planner:
+            from agents.planning_agent import PlanningAgent
             self.log("Initializing Agent Framework")
-            self.planner = PlanningAgent(self.collection)
+            self.planner = PlanningAgent(self.collection, alert_executor=self._alert_executor)
             self.log("Agent Framework is ready")
 
     def read_memory(self) -> List[Opportunity]:
         if self.USE_GCP:
             blob = self._get_gcs_blob()
+            legacy_blob = self._get_gcs_blob(self.GCP_LEGACY_BLOB_NAME)
             if blob and blob.exists():
-                try:
-                    content = blob.download_as_text()
-                    data = json.loads(content)
-                    self._memory_loaded_successfully = True
-                    self.log(f"Successfully loaded {len(data)} deals from GCP storage")
-                    return [Opportunity(**item) for item in data]
-                except Exception as e:
-                    logging.error(f"Failed to read memory from GCP: {e}")
-                    self._memory_loaded_successfully = False
-                    return []
+                source = blob
+            elif legacy_blob and legacy_blob.exists():
+                source = legacy_blob
+                self._memory_needs_rewrite = True
             else:
                 # Blob doesn't exist yet - this is a fresh start, mark as successful
                 self._memory_loaded_successfully = True
                 self.log("No existing memory found in GCP, starting fresh")
                 return []
+            try:
+                data = self._parse_memory(source.download_as_bytes())
+                self._memory_loaded_successfully = True
+                self.log(f"Successfully loaded {len(data)} deals from GCP storage")
+                return [Opportunity(**item) for item in data]
+            except Exception as e:
+                logging.error(f"Failed to read memory from GCP: {e}")
+                self._memory_loaded_successfully = False
+                return []
         else:
             if os.path.exists(self.MEMORY_FILENAME):
-                try:
-                    with open(self.MEMORY_FILENAME, "r") as file:
-                        data = json.load(file)
-                    opportunities = [Opportunity(**item) for item in data]
-                    self._memory_loaded_successfully = True
-                    return opportunities
-                except Exception as e:
-                    logging.error(f"Failed to read memory from local file: {e}")
-                    self._memory_loaded_successfully = False
-                    return []
+                filename = self.MEMORY_FILENAME
+            elif os.path.exists(self.LEGACY_MEMORY_FILENAME):
+                filename = self.LEGACY_MEMORY_FILENAME
+                self._memory_needs_rewrite = True
             else:
                 # File doesn't exist yet - this is a fresh start, mark as successful
                 self._memory_loaded_successfully = True
                 return []
+            try:
+                with open(filename, "rb") as file:
+                    data = self._parse_memory(file.read())
+                opportunities = [Opportunity(**item) for item in data]
+                self._memory_loaded_successfully = True
+                return opportunities
+            except Exception as e:
+                logging.error(f"Failed to read memory from local file: {e}")
+                self._memory_loaded_successfully = False
+                return []
 
     def write_memory(self) -> None:
+        """Rewrites the whole memory to storage as JSON Lines."""
         # Safety check: Only write if memory was successfully loaded to prevent data loss
         if not self._memory_loaded_successfully:
             logging.error("SAFETY: Refusing to write memory because initial read failed. This prevents data loss.")
             return
         
         data = [opportunity.model_dump() for opportunity in self.memory]
+        payload = b"".join(orjson.dumps(item) + b"\n" for item in data)
         self.log(f"Writing {len(data)} deals to storage")
         
         if self.USE_GCP:
             blob = self._get_gcs_blob()
             if blob:
                 try:
-                    blob.upload_from_string(
-                        json.dumps(data, indent=2),
-                        content_type="application/json"
-                    )
+                    blob.upload_from_string(payload, content_type="application/x-ndjson")
+                    self._memory_needs_rewrite = False
                     self.log(f"Successfully saved {len(data)} deals to GCP storage")
                 except Exception as e:
                     logging.error(f"Failed to write memory to GCP: {e}")
         else:
-            with open(self.MEMORY_FILENAME, "w") as file:
-                json.dump(data, file, indent=2)
+            with open(self.MEMORY_FILENAME, "wb") as file:
+                file.write(payload)
+            self._memory_needs_rewrite = False
+
+    def append_memory(self, opportunity: Opportunity) -> None:
+        """Appends a single opportunity to storage without rewriting the existing deals."""
+        # Safety check: Only write if memory was successfully loaded to prevent data loss
+        if not self._memory_loaded_successfully:
+            logging.error("SAFETY: Refusing to write memory because initial read failed. This prevents data loss.")
+            return
+        if self._memory_needs_rewrite:
+            self.write_memory()
+            return
+        
+        line = orjson.dumps(opportunity.model_dump()) + b"\n"
+        self.log("Appending 1 deal to storage")
+        
+        if self.USE_GCP:
+            blob = self._get_gcs_blob()
+            if blob:
+                try:
+                    if blob.exists():
+                        # Upload just the new line, then let GCS concatenate it onto the memory blob
+                        part = self._get_gcs_blob(f"{self.GCP_BLOB_NAME}.append-{uuid.uuid4().hex}")
+                        part.upload_from_string(line, content_type="application/x-ndjson")
+                        blob.compose([blob, part])
+                        part.delete()
+                    else:
+                        blob.upload_from_string(line, content_type="application/x-ndjson")
+                    self.log("Successfully appended 1 deal to GCP storage")
+                except Exception as e:
+                    logging.error(f"Failed to append memory to GCP: {e}")
+        else:
+            with open(self.MEMORY_FILENAME, "ab") as file:
+                file.write(line)
 
     def reset_memory(self) -> None:
         """Truncates memory to the first 2 items."""
-        truncated_data = [opportunity.model_dump() for opportunity in self.memory[:2]]
-        self.memory = [Opportunity(**item) for item in truncated_data]
+        self.memory = self.memory[:2]
         self.write_memory()
 
     def log(self, message: str):
@@ -181,24 +252,24 @@ class DealAgentFramework:
             # Add timestamp when the deal was added
             result.added_at = datetime.now(ZoneInfo("Asia/Kolkata")).isoformat()
             self.memory.append(result)
-            self.write_memory()
+            self.append_memory(result)
         return self.memory
 
     @classmethod
     def get_plot_data(cls, max_datapoints=2000):
+        import numpy as np
+        from sklearn.manifold import TSNE
         print(f"DEBUG: get_plot_data looking for DB at {cls.DB}")
-        client = chromadb.PersistentClient(path=cls.DB)
-        collection = client.get_or_create_collection("products")
-        result = collection.get(
+        result = cls._collection().get(
             include=["embeddings", "documents", "metadatas"], limit=max_datapoints
         )
         if result["embeddings"] is None or len(result["embeddings"]) == 0:
             return [], [], [], []
             
-        vectors = np.array(result["embeddings"])
+        vectors = np.asarray(result["embeddings"], dtype=np.float32)
         documents = result["documents"]
         categories = [metadata["category"] for metadata in result["metadatas"]]
-        colors = [COLORS[CATEGORIES.index(c)] for c in categories]
+        colors = [CATEGORY_COLOR[c] for c in categories]
         
         # TSNE requires at least 4 samples for 3 components by default if no perplexity is set, 
         # or perplexity < n_samples. 
@@ -206,10 +277,48 @@ class DealAgentFramework:
             # Not enough data for TSNE
             return documents, np.zeros((len(vectors), 3)), colors, categories
             
-        tsne = TSNE(n_components=3, random_state=42, n_jobs=-1, perplexity=min(30, len(vectors) - 1))
-        reduced_vectors = tsne.fit_transform(vectors)
+        # TSNE is expensive, so reuse the last reduction while the embedded items are unchanged.
+        # Ids alone are reused when the store is rebuilt, so the embeddings are part of the key too
+        digest = hashlib.sha1("\n".join(result["ids"]).encode("utf-8"))
+        digest.update(vectors.tobytes())
+        cache_key = digest.hexdigest()
+        reduced_vectors = cls._load_tsne_cache(cache_key)
+        if reduced_vectors is None:
+            tsne = TSNE(
+                n_components=3,
+                random_state=42,
+                n_jobs=-1,
+                perplexity=min(30, len(vectors) - 1),
+                method="barnes_hut",
+                init="pca",
+            )
+            reduced_vectors = tsne.fit_transform(vectors)
+            cls._save_tsne_cache(cache_key, reduced_vectors)
         return documents, reduced_vectors, colors, categories
 
+    @classmethod
+    def _load_tsne_cache(cls, cache_key: str):
+        """Returns the cached TSNE reduction for this key, or None on a miss."""
+        import numpy as np
+        if not os.path.exists(cls.TSNE_CACHE_FILENAME):
+            return None
+        try:
+            with np.load(cls.TSNE_CACHE_FILENAME) as cached:
+                if str(cached["key"]) == cache_key:
+                    return cached["reduced"]
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable TSNE cache: {e}")
+        return None
+
+    @classmethod
+    def _save_tsne_cache(cls, cache_key: str, reduced_vectors) -> None:
+        """Persists the TSNE reduction so later calls can skip recomputing it."""
+        import numpy as np
+        try:
+            np.savez(cls.TSNE_CACHE_FILENAME, key=cache_key, reduced=reduced_vectors)
+        except Exception as e:
+            logging.warning(f"Failed to write TSNE cache: {e}")
+
 
 if __name__ == "__main__":
     DealAgentFramework().run()
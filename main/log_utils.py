@@ -1,3 +1,5 @@
+import re
+
 # Foreground colors
 RED = '\033[31m'
 GREEN = '\033[32m'
@@ -26,10 +28,18 @@ mapper = {
 }
 
 
+# Single alternation over every colour prefix, so reformat rewrites a message in one pass
+_PATTERN = re.compile("|".join(re.escape(key) for key in mapper) + "|" + re.escape(RESET))
+_SUB = {key: f'<span style="color: {value}">' for key, value in mapper.items()}
+_SUB[RESET] = '</span>'
+
+
 def reformat(message):
-    for key, value in mapper.items():
-        message = message.replace(key, f'<span style="color: {value}">')
-    message = message.replace(RESET, '</span>')
-    return message
-    
-    
\ No newline at end of file
+    return _PATTERN.sub(lambda match: _SUB[match.group(0)], message)
+
+
+def reformat_many(messages):
+    """Reformat a batch of messages with a single regex pass over all of them."""
+    if not messages:
+        return []
+    return reformat("\x1f".join(messages)).split("\x1f")
@@ -6,10 +6,14 @@ import base64
 import os
 import json
 import logging
+import threading
+import time
 from datetime import datetime
 from typing import Tuple
+import orjson
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
+from google.api_core.exceptions import PreconditionFailed
 from google.cloud import storage
 
 load_dotenv(override=True)
@@ -27,12 +31,20 @@ class RateLimiter:
     USE_GCP = os.getenv("USE_GCP", "False").lower() == "true"
     GCP_BUCKET_NAME = os.getenv("GCP_BUCKET_NAME", "price-is-right-memory")
     MAX_DAILY_RUNS = int(os.getenv("MAX_DAILY_RUNS", "20"))
+    # Pretty-print stored run counts for debugging; compact JSON otherwise
+    DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+    
+    # How long a run count read from GCP is reused before reading it again
+    CACHE_TTL_SECONDS = 5
     
     def __init__(self):
         """Initialize the rate limiter with GCP storage client."""
         self.storage_client = None
         if self.USE_GCP:
             self.storage_client = self._init_gcp_client()
+        # Cached (date, run_count, generation, monotonic fetch time) of the last GCS read or write
+        self._cached_state = None
+        self._cache_lock = threading.Lock()
     
     def _init_gcp_client(self):
         """Initializes GCP storage client from base64 secret."""
@@ -64,6 +76,43 @@ class RateLimiter:
         bucket = self.storage_client.bucket(self.GCP_BUCKET_NAME)
         return bucket.blob(blob_name)
     
+    def _cache_run_state(self, date: str, count: int, generation: int) -> None:
+        """Remembers the latest known run count and blob generation."""
+        with self._cache_lock:
+            self._cached_state = (date, count, generation, time.monotonic())
+    
+    def _read_run_state(self, use_cache: bool = True) -> Tuple[int, int]:
+        """
+        Reads the current run count and blob generation from GCP storage.
+        A generation of 0 means no blob exists yet for today.
+        Reuses the last read for CACHE_TTL_SECONDS unless use_cache is False.
+        """
+        current_date = self._get_current_ist_date()
+        with self._cache_lock:
+            cached = self._cached_state
+        if use_cache and cached:
+            date, count, generation, fetched_at = cached
+            if date == current_date and time.monotonic() - fetched_at < self.CACHE_TTL_SECONDS:
+                return count, generation
+        
+        if not self.storage_client:
+            return 0, 0
+        
+        blob_name = self._get_blob_name(current_date)
+        try:
+            # get_blob returns the blob with its metadata, or None if it does not exist
+            blob = self.storage_client.bucket(self.GCP_BUCKET_NAME).get_blob(blob_name)
+            if blob is None:
+                count, generation = 0, 0
+            else:
+                data = orjson.loads(blob.download_as_bytes(if_generation_match=blob.generation))
+                count, generation = data.get("run_count", 0), blob.generation
+        except Exception as e:
+            logging.error(f"Failed to read run count from GCP: {e}")
+            return 0, 0
+        self._cache_run_state(current_date, count, generation)
+        return count, generation
+    
     def _read_run_count(self) -> int:
         """
         Reads the current run count from GCP storage.
@@ -74,23 +123,13 @@ class RateLimiter:
             logging.warning("GCP not configured, rate limiting disabled")
             return 0
         
-        current_date = self._get_current_ist_date()
-        blob_name = self._get_blob_name(current_date)
-        blob = self._get_gcs_blob(blob_name)
-        
-        if blob and blob.exists():
-            try:
-                content = blob.download_as_text()
-                data = json.loads(content)
-                return data.get("run_count", 0)
-            except Exception as e:
-                logging.error(f"Failed to read run count from GCP: {e}")
-                return 0
-        return 0
+        return self._read_run_state()[0]
     
-    def _write_run_count(self, count: int) -> bool:
+    def _write_run_count(self, count: int, if_generation_match: int = None) -> bool:
         """
         Writes the run count to GCP storage.
+        When if_generation_match is given, the write only succeeds if the blob is
+        still at that generation, and PreconditionFailed is raised otherwise.
         Returns True on success, False on failure.
         """
         if not self.USE_GCP:
@@ -108,10 +147,14 @@ class RateLimiter:
                     "last_updated": datetime.now(self.IST_TIMEZONE).isoformat()
                 }
                 blob.upload_from_string(
-                    json.dumps(data, indent=2),
-                    content_type="application/json"
+                    orjson.dumps(data, option=orjson.OPT_INDENT_2 if self.DEBUG else None),
+                    content_type="application/json",
+                    if_generation_match=if_generation_match,
                 )
+                self._cache_run_state(current_date, count, blob.generation)
                 return True
+            except PreconditionFailed:
+                raise
             except Exception as e:
                 logging.error(f"Failed to write run count to GCP: {e}")
                 return False
@@ -136,9 +179,20 @@ class RateLimiter:
         Returns:
             True if increment was successful, False otherwise.
         """
-        current_count = self._read_run_count()
-        new_count = current_count + 1
-        return self._write_run_count(new_count)
+        if not self.USE_GCP:
+            return True
+        
+        # Read (usually served from the cache) and write once, guarded by the blob generation
+        # so concurrent instances cannot overwrite each other's increments
+        use_cache = True
+        for _ in range(3):
+            current_count, generation = self._read_run_state(use_cache=use_cache)
+            try:
+                return self._write_run_count(current_count + 1, if_generation_match=generation)
+            except PreconditionFailed:
+                use_cache = False
+        logging.error("Failed to increment run count: run count kept changing concurrently")
+        return False
     
     def get_status_message(self) -> str:
         """
@@ -5,11 +5,13 @@ This module provides the main UI class that builds and manages the Gradio interf
 CSS styles are imported from styles.py and helper functions from helpers.py.
 """
 
-import queue
-import threading
+import asyncio
+import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 import gradio as gr
 from deal_agent_framework import DealAgentFramework
+from log_utils import reformat_many
 from rate_limiter import RateLimiter
 
 # Import styles and templates
@@ -26,69 +28,172 @@ from ui.styles import (
 
 # Import helper functions
 from ui.helpers import (
+    LogBuffer,
     setup_logging,
     is_valid_email,
     html_for_logs,
+    new_log_window,
     create_3d_plot,
     format_opportunity_row,
+    HOT_DEAL_INDICATOR,
 )
 
+# Column types for the deals table. Keep "Date Added" as "str": Gradio's "date" datatype renders
+# dramatically slower, so do not switch any column to "date". The URL column is pre-rendered HTML,
+# which avoids a markdown parse per cell on every render.
+DEAL_TABLE_DATATYPES = ["str", "str", "str", "str", "str", "str", "html"]
+
+# Status messages that never change, rendered once at import
+EMAIL_PROMPT_HTML = get_status_html("📧 Enter your email to enable the Hunt for Deals button", style="info")
+INVALID_EMAIL_HTML = get_status_html("⚠️ Please enter a valid email address", style="error")
+
+# Tag for the worker's final result, sent on the log queue after the last log record
+RESULT = "RESULT"
+
 
 class GradioUI:
     """Gradio-based user interface for the Price is Right application."""
     
+    # Rows sent with intermediate updates while the agent runs; the final update sends every row
+    PREVIEW_ROWS = 50
+    # Minimum time between log updates; lines arriving sooner are sent together with the next update
+    UPDATE_INTERVAL_SECONDS = 0.05
+    # Points drawn in the 3D plot, sampled evenly from the reduced embeddings
+    PLOT_MAX_POINTS = 200
+    # How long a rendered rate limit status is reused before asking the rate limiter again
+    STATUS_TTL_SECONDS = 1.0
+    
     def __init__(self, agent_framework: DealAgentFramework):
         self.agent_framework = agent_framework
         self.rate_limiter = RateLimiter()
-
-    def _table_for(self, opps, highlight_index=None):
-        """Convert opportunities to table format, sorted by date (latest first)."""
-        # Sort by added_at timestamp (latest first), handling None values
-        sorted_opps = sorted(
-            opps, 
-            key=lambda opp: opp.added_at or "1970-01-01", 
-            reverse=True
+        # Last plot figure and the vector store size it was built from
+        self._cached_plot = None
+        self._cached_plot_size = -1
+        # (opportunity list, its length, the list sorted latest first) from the last sort
+        self._sorted_memory_cache = None
+        # id(opportunity) -> (opportunity, formatted row); holding the opportunity keeps its id unique
+        self._row_cache = {}
+        # (sorted opportunities, highlight_index, limit, table) from the last _table_for call
+        self._last_table = None
+        # (email, outputs) from the last validation, so repeated inputs skip the regex and rate limiter
+        self._last_email_validation = None
+        # (status html, monotonic expiry) of the last rate limit status
+        self._status_cache = None
+        # Agent runs share one long-lived worker thread, which also keeps runs from overlapping
+        self._run_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deal-hunt")
+        # Installed once; each run points it at that run's log buffer
+        self._log_handler = setup_logging()
+        self._rate_limit_html = get_status_html(
+            f"⚠️ Daily limit reached! Maximum {self.rate_limiter.MAX_DAILY_RUNS} runs per day allowed. Resets at 12 AM IST.",
+            style="error"
         )
+
+    def _sorted_latest_first(self, opps):
+        """Return opportunities sorted by date (latest first), reusing the last sort while the list is unchanged."""
+        if not isinstance(opps, list):
+            # Read any other iterable once, so it is not iterated again for the length check and sort
+            opps = list(opps)
+        cached = self._sorted_memory_cache
+        if cached is None or cached[0] is not opps or cached[1] != len(opps):
+            if cached is not None and len(opps) < cached[1]:
+                # Memory shrank (e.g. reset), so drop rows for opportunities that are gone
+                self._row_cache.clear()
+            # Sort by added_at timestamp (latest first), handling None values
+            sorted_opps = sorted(
+                opps, 
+                key=lambda opp: opp.added_at or "1970-01-01", 
+                reverse=True
+            )
+            cached = (opps, len(opps), sorted_opps)
+            self._sorted_memory_cache = cached
+        return cached[2]
+
+    def _row_for(self, opp, is_new=False):
+        """Return the formatted table row for an opportunity, formatting it only once."""
+        cached = self._row_cache.get(id(opp))
+        if cached is None or cached[0] is not opp:
+            cached = (opp, format_opportunity_row(opp, is_new=False))
+            self._row_cache[id(opp)] = cached
+        row = cached[1]
+        return [HOT_DEAL_INDICATOR, *row[1:]] if is_new else row
+
+    def _table_for(self, opps, highlight_index=None, limit=None):
+        """Convert opportunities to table format, sorted by date (latest first), optionally keeping only the first `limit` rows."""
+        sorted_opps = self._sorted_latest_first(opps)
+        last = self._last_table
+        if last is not None and last[0] is sorted_opps and last[1] == highlight_index and last[2] == limit:
+            return last[3]
+        shown = sorted_opps if limit is None else sorted_opps[:limit]
+        # The newly added deal (if any) is first after sorting
+        table = [
+            self._row_for(opp, is_new=(i == 0 and highlight_index is not None))
+            for i, opp in enumerate(shown)
+        ]
+        self._last_table = (sorted_opps, highlight_index, limit, table)
+        return table
+
+    async def _update_output(self, log_data, log_queue, table):
+        """Async generator that yields log updates and results as soon as they are queued.
         
-        rows = []
-        for i, opp in enumerate(sorted_opps):
-            # Check if this is the newly added deal (it will be first after sorting)
-            is_new = (i == 0 and highlight_index is not None)
-            rows.append(format_opportunity_row(opp, is_new=is_new))
-        return rows
-
-    def _update_output(self, log_data, log_queue, result_queue, email, had_new_deal):
-        """Generator that yields log updates and results."""
-        from log_utils import reformat
-        
-        initial_result = self._table_for(self.agent_framework.memory)
-        final_result = None
+        `table` is sent with the first update and skipped afterwards, until the final result replaces it.
+        """
+        last_update = 0.0
         while True:
-            try:
-                message = log_queue.get_nowait()
-                log_data.append(reformat(message))
-                yield log_data, html_for_logs(log_data), final_result or initial_result, gr.update(interactive=False), ""
-            except queue.Empty:
-                try:
-                    final_result = result_queue.get_nowait()
-                    # Re-enable button and show status after completion
-                    status = self.rate_limiter.get_status_message()
-                    yield log_data, html_for_logs(log_data), final_result, gr.update(interactive=True), status
-                except queue.Empty:
-                    if final_result is not None:
-                        break
-                    time.sleep(0.1)
+            # Everything buffered since the last update is rendered and sent as a single update
+            messages = await log_queue.get_batch()
+            wait = last_update + self.UPDATE_INTERVAL_SECONDS - time.monotonic()
+            if wait > 0 and not self._is_result(messages[-1]):
+                # Hold back updates that would follow the previous one too closely, collecting more lines meanwhile
+                await asyncio.sleep(wait)
+                messages.extend(log_queue.drain())
+            final_result = None
+            lines = []
+            for message in messages:
+                if self._is_result(message):
+                    final_result = message[1]
+                    break
+                lines.append(message)
+            log_data.extend(reformat_many(lines))
+            if final_result is not None:
+                # The worker has finished - re-enable button and show status
+                status = self._get_status_message()
+                yield log_data, html_for_logs(log_data), final_result, gr.update(interactive=True), status
+                break
+            # The button was disabled when the run started, so it is left as it is until the end
+            yield log_data, html_for_logs(log_data), table, gr.skip(), gr.skip()
+            last_update = time.monotonic()
+            # The table doesn't change until the run finishes, so later updates leave it untouched
+            table = gr.skip()
+
+    @staticmethod
+    def _is_result(message) -> bool:
+        """Whether a log queue message is the worker's final result rather than a log line."""
+        return isinstance(message, tuple) and message[0] == RESULT
+
+    def _get_status_message(self):
+        """Return the rate limit status message, refreshed at most once per STATUS_TTL_SECONDS."""
+        now = time.monotonic()
+        if self._status_cache is None or now >= self._status_cache[1]:
+            self._status_cache = (self.rate_limiter.get_status_message(), now + self.STATUS_TTL_SECONDS)
+        return self._status_cache[0]
 
     def _get_plot(self):
-        """Generate the 3D scatter plot visualization."""
-        documents, vectors, colors, categories = DealAgentFramework.get_plot_data(max_datapoints=800)
-        return create_3d_plot(documents, vectors, colors, categories)
+        """Generate the 3D scatter plot visualization, reusing it while the vector store is unchanged."""
+        size = self.agent_framework.collection.count()
+        if self._cached_plot is None or size != self._cached_plot_size:
+            documents, vectors, colors, categories = DealAgentFramework.get_plot_data(max_datapoints=800)
+            self._cached_plot = create_3d_plot(
+                documents, vectors, colors, categories, max_points=self.PLOT_MAX_POINTS
+            )
+            self._cached_plot_size = size
+        return self._cached_plot
 
     def _do_run(self, email: str = None):
         """Execute the agent framework and return table data."""
         # Store email in framework for messaging agent to use
         self.agent_framework.user_email = email
-        memory_before = len(self.agent_framework.memory)
+        memory = self.agent_framework.memory
+        memory_before = len(memory)
         new_opportunities = self.agent_framework.run()
         # Check if a new deal was added
         had_new_deal = len(new_opportunities) > memory_before
@@ -98,77 +203,86 @@ class GradioUI:
 
     def _validate_email(self, email: str):
         """Validate email and return button state + status message."""
+        cached = self._last_email_validation
+        if cached is not None and cached[0] == email:
+            return cached[1]
         if is_valid_email(email):
-            status = self.rate_limiter.get_status_message()
-            return gr.update(interactive=True), status
+            status = self._get_status_message()
+            result = gr.update(interactive=True), status
         else:
             if email and email.strip():
-                return gr.update(interactive=False), get_status_html(
-                    "⚠️ Please enter a valid email address", 
-                    style="error"
-                )
+                result = gr.update(interactive=False), INVALID_EMAIL_HTML
             else:
-                return gr.update(interactive=False), get_status_html(
-                    "📧 Enter your email to enable the Hunt for Deals button",
-                    style="info"
-                )
+                result = gr.update(interactive=False), EMAIL_PROMPT_HTML
+        self._last_email_validation = (email, result)
+        return result
 
-    def _run_with_logging(self, initial_log_data, email):
+    async def _run_with_logging(self, initial_log_data, email):
         """Run the agent with logging support."""
+        memory = self.agent_framework.memory
+        # Built once per click and shared by the early exits and the first log update
+        table = self._table_for(memory)
         # First check rate limit
-        can_run, remaining = self.rate_limiter.can_run()
+        can_run, remaining = await asyncio.to_thread(self.rate_limiter.can_run)
         if not can_run:
-            error_msg = get_status_html(
-                f"⚠️ Daily limit reached! Maximum {self.rate_limiter.MAX_DAILY_RUNS} runs per day allowed. Resets at 12 AM IST.",
-                style="error"
-            )
-            yield initial_log_data, html_for_logs(initial_log_data), self._table_for(self.agent_framework.memory), gr.update(interactive=True), error_msg
+            yield initial_log_data, html_for_logs(initial_log_data), table, gr.update(interactive=True), self._rate_limit_html
             return
         
         # Validate email with regex
         if not is_valid_email(email):
-            error_msg = get_status_html(
-                "⚠️ Please enter a valid email address.",
-                style="error"
-            )
-            yield initial_log_data, html_for_logs(initial_log_data), self._table_for(self.agent_framework.memory), gr.update(interactive=True), error_msg
+            yield initial_log_data, html_for_logs(initial_log_data), table, gr.update(interactive=True), INVALID_EMAIL_HTML
             return
         
         email = email.strip()
         
-        log_queue = queue.Queue()
-        result_queue = queue.Queue()
-        setup_logging(log_queue)
-        memory_before = len(self.agent_framework.memory)
+        # Disable the button and clear the status once; log updates leave both untouched
+        yield gr.skip(), gr.skip(), gr.skip(), gr.update(interactive=False), ""
+        
+        loop = asyncio.get_running_loop()
+        log_queue = LogBuffer(loop)
+        self._log_handler.log_queue = log_queue
 
         def worker():
             result = self._do_run(email)
             # Increment rate limit counter after successful run
             self.rate_limiter.increment_run_count()
-            result_queue.put(result)
+            return result
+
+        async def run():
+            try:
+                result = await loop.run_in_executor(self._run_executor, worker)
+            except Exception as e:
+                logging.error(f"Agent run failed: {e}")
+                result = self._table_for(memory)
+            # The run count changed, so the cached statuses are stale
+            self._last_email_validation = None
+            self._status_cache = None
+            # Worker log records are already buffered, so the generator sees every line first
+            log_queue.put((RESULT, result))
 
-        thread = threading.Thread(target=worker)
-        thread.start()
+        task = asyncio.create_task(run())
 
-        had_new_deal = len(self.agent_framework.memory) > memory_before
-        for log_data, output, final_result, button_state, status in self._update_output(
-            initial_log_data, log_queue, result_queue, email, had_new_deal
-        ):
-            yield log_data, output, final_result, button_state, status
+        try:
+            async for log_data, output, final_result, button_state, status in self._update_output(
+                initial_log_data, log_queue, table[:self.PREVIEW_ROWS]
+            ):
+                yield log_data, output, final_result, button_state, status
+            await task
+        finally:
+            if self._log_handler.log_queue is log_queue:
+                self._log_handler.log_queue = None
 
     def _do_select(self, selected_index: gr.SelectData):
         """Handle row selection in the dataframe."""
-        opportunities = self.agent_framework.memory
+        memory = self.agent_framework.memory
         row = selected_index.index[0]
-        opportunity = opportunities[row]
-        self.agent_framework.planner.messenger.alert(opportunity)
+        opportunity = memory[row]
+        # Queued on the framework's alert executor, so the table doesn't wait for the email to send
+        self.agent_framework.planner.send_alerts([opportunity])
 
     def _get_initial_status(self):
         """Get the initial status message for rate limiting."""
-        return get_status_html(
-            "📧 Enter your email to enable the Hunt for Deals button",
-            style="info"
-        )
+        return EMAIL_PROMPT_HTML
 
     def build(self) -> gr.Blocks:
         """Build and return the Gradio UI."""
@@ -176,7 +290,7 @@ class GradioUI:
             title="The Price is Right",
             fill_width=True,
         ) as ui:
-            log_data = gr.State([])
+            log_data = gr.State(new_log_window())
 
             # Header section with elegant title
             gr.HTML(HEADER_HTML)
@@ -203,7 +317,7 @@ class GradioUI:
             with gr.Row():
                 opportunities_dataframe = gr.Dataframe(
                     headers=["", "Deal Description", "Price", "Estimate", "Discount", "Date Added", "URL"],
-                    datatype=["str", "str", "str", "str", "str", "str", "markdown"],
+                    datatype=DEAL_TABLE_DATATYPES,
                     wrap=True,
                     column_widths=[1, 5, 1, 1, 1, 2, 2],
                     row_count=10,
@@ -220,13 +334,14 @@ class GradioUI:
                     logs = gr.HTML()
                 with gr.Column(scale=1):
                     gr.HTML(PLOT_LABEL)
-                    plot = gr.Plot(value=self._get_plot(), show_label=False)
+                    plot = gr.Plot(value=None, show_label=False)
 
             # Event handlers
             email_input.change(
                 self._validate_email,
                 inputs=[email_input],
                 outputs=[run_button, status_message],
+                show_progress="hidden",
             )
 
             run_button.click(
@@ -237,6 +352,9 @@ class GradioUI:
 
             opportunities_dataframe.select(self._do_select)
 
+            # Build the plot after the page has loaded so it doesn't block UI startup
+            ui.load(self._get_plot, outputs=plot)
+
         return ui
 
     def launch(self, **kwargs):
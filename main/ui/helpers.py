@@ -2,84 +2,142 @@
 Helper functions and utilities for the Gradio UI.
 """
 
+import asyncio
+import html
 import logging
+import operator
 import re
-import queue
+from collections import deque
 import numpy as np
 import plotly.graph_objects as go
-from log_utils import reformat
+import plotly.io as pio
+
+# Serialize figures with orjson (a project dependency) instead of the stdlib json encoder
+pio.json.config.default_engine = "orjson"
+
+# First-column marker for a newly added deal in the deals table
+HOT_DEAL_INDICATOR = "🔥✨ HOT DEAL"
 
 # Email validation regex pattern
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
+# Pulls the fields shown in a deals table row out of an Opportunity in one call
+ROW_GETTER = operator.attrgetter(
+    "deal.product_description", "deal.price", "estimate", "discount", "added_at", "deal.url"
+)
+
+# Shared formatter for records shown in the UI log panel
+LOG_FORMATTER = logging.Formatter(
+    "[%(asctime)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S %z",
+)
+
+
+class LogBuffer:
+    """Single-consumer buffer that carries log records from worker threads to the event loop.
+    
+    Producers append to a deque, which is thread-safe for append/popleft, and the loop is only
+    woken once per burst rather than once per record. The consumer takes everything buffered so far.
+    The deque is bounded: if the consumer falls behind, the oldest records are dropped instead of
+    blocking the producer.
+    """
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, capacity: int = 1024):
+        self.loop = loop
+        self._messages = deque(maxlen=capacity)
+        self._ready = asyncio.Event()
+        self._wakeup_pending = False
+
+    def put(self, message) -> None:
+        """Buffer a message; safe to call from any thread."""
+        self._messages.append(message)
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        self._wakeup_pending = False
+        self._ready.set()
+
+    def drain(self) -> list:
+        """Return every buffered message in order without waiting."""
+        messages = []
+        while self._messages:
+            messages.append(self._messages.popleft())
+        return messages
+
+    async def get_batch(self) -> list:
+        """Wait for at least one message, then return every buffered message in order."""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            messages = self.drain()
+            if messages:
+                return messages
+
 
 class QueueHandler(logging.Handler):
-    """Custom logging handler that puts log records into a queue."""
+    """Custom logging handler that puts log records into a queue.
+    
+    The target queue can be swapped between runs; records are dropped while it is None.
+    """
     
-    def __init__(self, log_queue):
+    def __init__(self, log_queue=None):
         super().__init__()
         self.log_queue = log_queue
 
     def emit(self, record):
-        self.log_queue.put(self.format(record))
+        log_queue = self.log_queue
+        if log_queue is not None:
+            log_queue.put(self.format(record))
 
 
-def setup_logging(log_queue: queue.Queue) -> None:
-    """Set up logging with the queue handler."""
-    handler = QueueHandler(log_queue)
-    formatter = logging.Formatter(
-        "[%(asctime)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S %z",
-    )
-    handler.setFormatter(formatter)
+def setup_logging(log_queue=None) -> QueueHandler:
+    """Set up logging with the queue handler, replacing any queue handler installed earlier."""
     logger = logging.getLogger()
+    for existing in [h for h in logger.handlers if isinstance(h, QueueHandler)]:
+        logger.removeHandler(existing)
+    handler = QueueHandler(log_queue)
+    handler.setFormatter(LOG_FORMATTER)
     logger.addHandler(handler)
     logger.setLevel(logging.INFO)
+    return handler
 
 
 def is_valid_email(email: str) -> bool:
     """Validate email using regex."""
     if not email:
         return False
-    return bool(EMAIL_REGEX.match(email.strip()))
-
-
-def html_for_logs(log_data: list) -> str:
-    """Format log data as HTML for display."""
-    output = "<br>".join(log_data[-18:])
-    return f"""
-    <div id="scrollContent" style="
-        height: 400px; 
-        overflow-y: auto; 
-        border: 2px solid transparent;
-        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%);
-        background-clip: padding-box;
-        border-radius: 12px;
-        padding: 16px;
-        font-family: 'SF Mono', 'Monaco', 'Consolas', monospace;
-        font-size: 13px;
-        line-height: 1.6;
-        color: #e2e8f0;
-        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3), inset 0 1px 0 rgba(255, 255, 255, 0.05);
-        position: relative;
-    ">
-    <div style="
-        position: absolute;
-        top: -2px;
-        left: -2px;
-        right: -2px;
-        bottom: -2px;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
-        border-radius: 14px;
-        z-index: -1;
-        opacity: 0.6;
-    "></div>
-    {output}
-    </div>
-    """
+    email = email.strip()
+    # Linear checks reject partially typed addresses before running the regex:
+    # there must be a local part, and a "." in the domain after the "@"
+    at = email.rfind("@")
+    if at < 1 or email.rfind(".") <= at + 1 or " " in email:
+        return False
+    return EMAIL_REGEX.match(email) is not None
+
+
+# Static wrapper around the log panel, split so each render only joins the visible lines.
+# Its styling lives in the .logs-panel rules of CUSTOM_CSS, so updates only carry the lines.
+LOGS_HTML_PREFIX = '<div id="scrollContent" class="logs-panel"><div class="logs-panel-glow"></div>'
+LOGS_HTML_SUFFIX = "</div>"
+# Number of most recent log lines shown in the panel
+LOGS_WINDOW = 18
 
 
-def create_3d_plot(documents: list, vectors: np.ndarray, colors: list, categories: list = None) -> go.Figure:
+def new_log_window() -> deque:
+    """Return an empty log buffer that keeps only the lines shown in the panel."""
+    return deque(maxlen=LOGS_WINDOW)
+
+
+def html_for_logs(log_data: deque) -> str:
+    """Format the log lines as HTML for display; log_data is a window from new_log_window()."""
+    return LOGS_HTML_PREFIX + "<br>".join(log_data) + LOGS_HTML_SUFFIX
+
+
+def create_3d_plot(
+    documents: list, vectors: np.ndarray, colors: list, categories: list = None, max_points: int = None
+) -> go.Figure:
     """Create the 3D scatter plot visualization for deal embeddings.
     
     Args:
@@ -87,6 +145,7 @@ def create_3d_plot(documents: list, vectors: np.ndarray, colors: list, categorie
         vectors: Numpy array of 3D coordinates after t-SNE reduction
         colors: List of color strings for each point
         categories: List of category names for each point (optional)
+        max_points: If given, keep every n-th point so that at most this many are plotted
     """
     # If no data is returned, show an empty plot with a message
     if not documents or len(vectors) == 0:
@@ -97,27 +156,52 @@ def create_3d_plot(documents: list, vectors: np.ndarray, colors: list, categorie
         )
         return fig
 
+    if max_points and len(vectors) > max_points:
+        # Stride sampling keeps the spread of the whole reduction, unlike taking the first points
+        step = -(-len(vectors) // max_points)
+        documents, vectors, colors = documents[::step], vectors[::step], colors[::step]
+        if categories:
+            categories = categories[::step]
+
     # Prepare hover text based on categories
     if categories:
-        # Format category names to be more readable
-        formatted_categories = [cat.replace("_", " ") for cat in categories]
-        # Clean and truncate product descriptions for concise hover
-        clean_docs = [doc.replace("Title: ", "", 1) if doc.startswith("Title: ") else doc for doc in documents]
-        truncated_docs = [doc[:15] + "..." if len(doc) > 15 else doc for doc in clean_docs]
-        hover_text = [f"<b>Category:</b> {cat}<br><b>Product:</b> {doc}" 
-                      for cat, doc in zip(formatted_categories, truncated_docs)]
+        # One pass per point: readable category name, product description without its "Title: " prefix,
+        # truncated for a concise hover
+        hover_text = []
+        for cat, doc in zip(categories, documents):
+            doc = doc.removeprefix("Title: ")
+            if len(doc) > 15:
+                doc = doc[:15] + "..."
+            hover_text.append(f"<b>Category:</b> {cat.replace('_', ' ')}<br><b>Product:</b> {doc}")
     else:
         hover_text = documents
 
+    # float32 is plenty for plot coordinates and halves the size of the typed arrays plotly sends;
+    # transposing gives each axis its own contiguous array
+    x, y, z = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32).T)
+
+    # Send one small index per point plus the few distinct colours, rather than a colour name per point
+    palette, color_index = np.unique(np.asarray(colors), return_inverse=True)
+    colorscale = []
+    for i, color in enumerate(palette):
+        colorscale += [[i / len(palette), str(color)], [(i + 1) / len(palette), str(color)]]
+
     # Create the 3D scatter plot
     fig = go.Figure(
         data=[
             go.Scatter3d(
-                x=vectors[:, 0],
-                y=vectors[:, 1],
-                z=vectors[:, 2],
+                x=x,
+                y=y,
+                z=z,
                 mode="markers",
-                marker=dict(size=2, color=colors, opacity=0.7),
+                marker=dict(
+                    size=2,
+                    color=color_index.astype(np.uint8),
+                    colorscale=colorscale,
+                    cmin=-0.5,
+                    cmax=len(palette) - 0.5,
+                    opacity=0.7,
+                ),
                 text=hover_text,
                 hovertemplate='%{text}<extra></extra>',
             )
@@ -158,25 +242,19 @@ def format_opportunity_row(opp, is_new: bool = False) -> list:
     Returns:
         List of formatted cell values for the row
     """
-    from datetime import datetime
+    description, price, estimate, discount, added_at, url = ROW_GETTER(opp)
     
-    # Format the date nicely if available
-    date_str = ""
-    if opp.added_at:
-        try:
-            dt = datetime.fromisoformat(opp.added_at)
-            date_str = dt.strftime("%Y-%m-%d %H:%M")
-        except:
-            date_str = opp.added_at[:16] if len(opp.added_at) > 16 else opp.added_at
+    # added_at is ISO 8601 text, so "YYYY-MM-DD HH:MM" is its first 16 characters with a space for the "T"
+    date_str = added_at[:16].replace("T", " ") if added_at else ""
     
-    indicator = "🔥✨ HOT DEAL" if is_new else ""
+    indicator = HOT_DEAL_INDICATOR if is_new else ""
     
     return [
         indicator,
-        opp.deal.product_description,
-        f"${opp.deal.price:.2f}",
-        f"${opp.estimate:.2f}",
-        f"${opp.discount:.2f}",
+        description,
+        f"${price:.2f}",
+        f"${estimate:.2f}",
+        f"${discount:.2f}",
         date_str,
-        f"[View Deal]({opp.deal.url})",  # Markdown link format for clickable URL
+        f'<a href="{html.escape(url)}" target="_blank">View Deal</a>',  # Pre-rendered HTML link for clickable URL
     ]
@@ -2,8 +2,10 @@
 CSS styles for the Gradio UI.
 """
 
+import re
+
 # Custom CSS for modern, visually appealing design
-CUSTOM_CSS = """
+_RAW_CSS = """
 /* Global styles and dark theme */
 .gradio-container {
     background: linear-gradient(135deg, #0c0c1e 0%, #1a1a3e 50%, #0d1b2a 100%) !important;
@@ -197,6 +199,35 @@ CUSTOM_CSS = """
     font-size: 0.9rem;
 }
 
+/* Agent log panel */
+.logs-panel {
+    height: 400px;
+    overflow-y: auto;
+    border: 2px solid transparent;
+    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%);
+    background-clip: padding-box;
+    border-radius: 12px;
+    padding: 16px;
+    font-family: 'SF Mono', 'Monaco', 'Consolas', monospace;
+    font-size: 13px;
+    line-height: 1.6;
+    color: #e2e8f0;
+    box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3), inset 0 1px 0 rgba(255, 255, 255, 0.05);
+    position: relative;
+}
+
+.logs-panel-glow {
+    position: absolute;
+    top: -2px;
+    left: -2px;
+    right: -2px;
+    bottom: -2px;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
+    border-radius: 14px;
+    z-index: -1;
+    opacity: 0.6;
+}
+
 /* Footer styling */
 footer {
     display: none !important;
@@ -213,6 +244,22 @@ footer {
 }
 """
 
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_WHITESPACE = re.compile(r"\s+")
+_CSS_PUNCTUATION_SPACE = re.compile(r"\s*([{};:,])\s*")
+
+
+def _minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace from CSS."""
+    css = _CSS_COMMENT.sub("", css)
+    css = _CSS_WHITESPACE.sub(" ", css)
+    css = _CSS_PUNCTUATION_SPACE.sub(r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+# Sent with every page load, so it is minified once here
+CUSTOM_CSS = _minify_css(_RAW_CSS)
+
 
 # HTML Templates
 HEADER_HTML = """
@@ -259,6 +306,38 @@ PLOT_LABEL = """
 """
 
 
+# Colours for each status style
+_STATUS_STYLES = {
+    "info": {
+        "bg": "rgba(102, 126, 234, 0.1)",
+        "border": "rgba(102, 126, 234, 0.2)",
+        "color": "#a0aec0"
+    },
+    "error": {
+        "bg": "rgba(255, 107, 107, 0.15)",
+        "border": "rgba(255, 107, 107, 0.4)",
+        "color": "#ff6b6b"
+    },
+    "success": {
+        "bg": "rgba(72, 187, 120, 0.15)",
+        "border": "rgba(72, 187, 120, 0.4)",
+        "color": "#48bb78"
+    }
+}
+
+# Status HTML for each style, rendered once; only the {message} placeholder is filled per call
+_STATUS_TEMPLATES = {
+    style: f'''
+        <div style="display: flex; align-items: center; justify-content: center; gap: 8px; 
+                    padding: 10px 16px; background: {s["bg"]}; 
+                    border: 1px solid {s["border"]}; border-radius: 8px;">
+            <span style="color: {s["color"]}; font-weight: 500;">{{message}}</span>
+        </div>
+    '''
+    for style, s in _STATUS_STYLES.items()
+}
+
+
 def get_status_html(message: str, style: str = "info") -> str:
     """Generate styled status HTML message.
     
@@ -266,30 +345,4 @@ def get_status_html(message: str, style: str = "info") -> str:
         message: The message to display
         style: One of 'info', 'error', or 'success'
     """
-    styles = {
-        "info": {
-            "bg": "rgba(102, 126, 234, 0.1)",
-            "border": "rgba(102, 126, 234, 0.2)",
-            "color": "#a0aec0"
-        },
-        "error": {
-            "bg": "rgba(255, 107, 107, 0.15)",
-            "border": "rgba(255, 107, 107, 0.4)",
-            "color": "#ff6b6b"
-        },
-        "success": {
-            "bg": "rgba(72, 187, 120, 0.15)",
-            "border": "rgba(72, 187, 120, 0.4)",
-            "color": "#48bb78"
-        }
-    }
-    
-    s = styles.get(style, styles["info"])
-    
-    return f'''
-        <div style="display: flex; align-items: center; justify-content: center; gap: 8px; 
-                    padding: 10px 16px; background: {s["bg"]}; 
-                    border: 1px solid {s["border"]}; border-radius: 8px;">
-            <span style="color: {s["color"]}; font-weight: 500;">{message}</span>
-        </div>
-    '''
+    return _STATUS_TEMPLATES.get(style, _STATUS_TEMPLATES["info"]).format(message=message)
@@ -1,4 +1,6 @@
+import functools
 import os
+import sys
 from huggingface_hub import HfApi
 
 # Configuration
@@ -10,28 +12,70 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOCAL_FOLDER = os.path.join(BASE_DIR, "products_vectorstore")
 # Target path in the repository (on Hugging Face Space)
 PATH_IN_REPO = "main/products_vectorstore"
+# Files that make up a Chroma store: the SQLite database plus each collection's HNSW segment files
+ALLOW_PATTERNS = ["*.sqlite3", "*.bin", "*.pickle"]
+# Fingerprint of the folder as of the last successful upload (not matched by ALLOW_PATTERNS)
+LAST_UPLOAD_FILE = os.path.join(LOCAL_FOLDER, ".last_upload")
 
-def upload():
-    api = HfApi()
-    
+
+@functools.lru_cache(maxsize=1)
+def _api() -> HfApi:
+    """Returns the shared Hugging Face API client."""
+    return HfApi()
+
+
+def _folder_fingerprint(root: str) -> str:
+    """Summarizes the folder's files as "count:total size:latest mtime", using one scandir pass per directory."""
+    count = total_size = latest_mtime = 0
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file() and entry.path != LAST_UPLOAD_FILE:
+                    stat = entry.stat()
+                    count += 1
+                    total_size += stat.st_size
+                    latest_mtime = max(latest_mtime, stat.st_mtime_ns)
+    return f"{count}:{total_size}:{latest_mtime}"
+
+
+def _read_last_fingerprint() -> str:
+    try:
+        with open(LAST_UPLOAD_FILE) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def upload(force: bool = False):
     if not os.path.exists(LOCAL_FOLDER):
         print(f"Error: Folder not found at {LOCAL_FOLDER}")
         return
 
+    fingerprint = _folder_fingerprint(LOCAL_FOLDER)
+    if not force and fingerprint == _read_last_fingerprint():
+        print("Vector store unchanged since the last upload, skipping (use --force to upload anyway)")
+        return
+
     print(f"Uploading {LOCAL_FOLDER} to {REPO_ID} (Space)...")
     
     try:
-        api.upload_folder(
+        _api().upload_folder(
             folder_path=LOCAL_FOLDER,
             path_in_repo=PATH_IN_REPO,
             repo_id=REPO_ID,
             repo_type=REPO_TYPE,
+            allow_patterns=ALLOW_PATTERNS,
             ignore_patterns=[], # This is crucial to bypass .gitignore
         )
+        with open(LAST_UPLOAD_FILE, "w") as file:
+            file.write(fingerprint)
         print("✅ Upload successful!")
         print(f"View files at: https://huggingface.co/spaces/{REPO_ID}/tree/main/{PATH_IN_REPO}")
     except Exception as e:
         print(f"❌ Upload failed: {e}")
 
 if __name__ == "__main__":
-    upload()
+    upload(force="--force" in sys.argv[1:])